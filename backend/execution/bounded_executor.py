@@ -0,0 +1,200 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+
+# ----------------------------------
+# Load shedding errors
+# ----------------------------------
+
+class EndpointBusy(Exception):
+    """Per-endpoint concurrency limit reached (maps to HTTP 429)."""
+
+    def __init__(self, endpoint, limit):
+        super().__init__(f"Too many concurrent '{endpoint}' requests (limit {limit})")
+        self.endpoint = endpoint
+        self.limit = limit
+
+
+class ExecutorSaturated(Exception):
+    """Shared CPU queue is full (maps to HTTP 503)."""
+
+    def __init__(self, queue_size, reason=None):
+        super().__init__(reason or f"CPU work queue is full ({queue_size} waiting)")
+        self.queue_size = queue_size
+
+
+# ----------------------------------
+# Worker-side wrapper
+# ----------------------------------
+
+def _timed_call(fn, args, kwargs):
+    # Module-level so it pickles for process pools; wall clock so the start
+    # time is comparable with the submit time taken in the parent process.
+    # Errors are returned, not raised, so their queue wait is still known.
+    started_at = time.time()
+    try:
+        return started_at, True, fn(*args, **kwargs)
+    except Exception as exc:
+        return started_at, False, exc
+
+
+# ----------------------------------
+# Bounded executor
+# ----------------------------------
+
+class BoundedExecutor:
+    """
+    Runs CPU-bound endpoint work off the event loop.
+
+    - `workers` threads or processes do the work
+    - at most `max_queue` calls wait behind them; beyond that -> ExecutorSaturated
+    - `endpoint_limits` caps in-flight calls per endpoint -> EndpointBusy
+
+    Admission is decided synchronously on the event loop, so rejected
+    requests never touch the pool. Slots are released by a done-callback on
+    the pool future, i.e. when the work really finishes, not when the
+    awaiting request is cancelled (client disconnect). That callback is
+    routed back to the loop, so all counters are only mutated from the loop
+    thread and need no locking.
+
+    A broken pool (a process worker died: OOM, segfault) is replaced with a
+    fresh one; calls caught by the breakage get ExecutorSaturated (503).
+    """
+
+    def __init__(self, kind="thread", workers=4, max_queue=32, endpoint_limits=None, wait_window=500):
+        if kind not in ("thread", "process"):
+            raise ValueError("kind must be 'thread' or 'process'")
+
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self.endpoint_limits = dict(endpoint_limits or {})
+
+        self._pool = self._new_pool()
+        self._restarts = 0
+
+        self._in_flight = 0
+        self._active = defaultdict(int)
+        self._completed = defaultdict(int)
+        self._failed = defaultdict(int)
+        self._cancelled = defaultdict(int)
+        self._shed = defaultdict(int)
+        self._waits = deque(maxlen=wait_window)
+
+    def _new_pool(self):
+        pool_cls = ThreadPoolExecutor if self.kind == "thread" else ProcessPoolExecutor
+        return pool_cls(max_workers=self.workers)
+
+    def _replace_pool(self, broken):
+        # Several callbacks may report the same breakage; restart only once
+        if self._pool is not broken:
+            return
+        self._pool = self._new_pool()
+        self._restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.workers)
+
+    async def run(self, endpoint, fn, *args, **kwargs):
+        limit = self.endpoint_limits.get(endpoint)
+        if limit is not None and self._active[endpoint] >= limit:
+            self._shed[endpoint] += 1
+            raise EndpointBusy(endpoint, limit)
+
+        if self.queue_depth >= self.max_queue:
+            self._shed[endpoint] += 1
+            raise ExecutorSaturated(self.queue_depth)
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.time()
+        pool = self._pool
+        try:
+            future = pool.submit(_timed_call, fn, args, kwargs)
+        except BrokenExecutor:
+            self._replace_pool(pool)
+            self._shed[endpoint] += 1
+            raise ExecutorSaturated(self.queue_depth, "CPU workers are restarting")
+
+        self._in_flight += 1
+        self._active[endpoint] += 1
+        future.add_done_callback(
+            lambda f: self._release_threadsafe(loop, pool, endpoint, submitted_at, f)
+        )
+
+        try:
+            _, ok, value = await asyncio.wrap_future(future)
+        except BrokenExecutor:
+            raise ExecutorSaturated(self.queue_depth, "CPU workers are restarting")
+        if not ok:
+            raise value
+        return value
+
+    def _release_threadsafe(self, loop, pool, endpoint, submitted_at, future):
+        # Runs on a pool thread (or the loop thread if already done)
+        try:
+            loop.call_soon_threadsafe(self._release, pool, endpoint, submitted_at, future)
+        except RuntimeError:
+            pass  # loop already closed during shutdown
+
+    def _release(self, pool, endpoint, submitted_at, future):
+        self._in_flight -= 1
+        self._active[endpoint] -= 1
+
+        if future.cancelled():
+            # Dropped while still queued: it waited until now and never ran
+            self._waits.append(max(0.0, time.time() - submitted_at))
+            self._cancelled[endpoint] += 1
+            return
+        if future.exception() is not None:
+            # The pool itself broke (e.g. a worker process died)
+            self._waits.append(max(0.0, time.time() - submitted_at))
+            self._failed[endpoint] += 1
+            if isinstance(future.exception(), BrokenExecutor):
+                self._replace_pool(pool)
+            return
+
+        started_at, ok, _ = future.result()
+        self._waits.append(max(0.0, started_at - submitted_at))
+        if ok:
+            self._completed[endpoint] += 1
+        else:
+            self._failed[endpoint] += 1
+
+    def stats(self) -> dict:
+        waits_ms = sorted(w * 1000 for w in self._waits)
+        endpoints = (
+            set(self.endpoint_limits) | set(self._completed) | set(self._failed)
+            | set(self._cancelled) | set(self._shed)
+        )
+
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "pool_restarts": self._restarts,
+            "wait_ms": {
+                "samples": len(waits_ms),
+                "avg": sum(waits_ms) / len(waits_ms) if waits_ms else 0.0,
+                "p95": waits_ms[int(0.95 * (len(waits_ms) - 1))] if waits_ms else 0.0,
+                "max": waits_ms[-1] if waits_ms else 0.0,
+            },
+            "endpoints": {
+                name: {
+                    "active": self._active[name],
+                    "limit": self.endpoint_limits.get(name),
+                    "completed": self._completed[name],
+                    "failed": self._failed[name],
+                    "cancelled": self._cancelled[name],
+                    "shed": self._shed[name],
+                }
+                for name in sorted(endpoints)
+            },
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
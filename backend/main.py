@@ -1,17 +1,48 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request, HTTPException
+from fastapi.responses import StreamingResponse, JSONResponse
 import pandas as pd
 import random
 import numpy as np
 from rag_advisor.advisor import regime_investor_guidance_json
+from regime_stream.broadcaster import RegimeBroadcaster, SubscriberLimitReached, format_sse
+from regime_stream.bar_sources import follow_csv
+from market_data.store import LabelledDataStore
+from execution.bounded_executor import BoundedExecutor, EndpointBusy, ExecutorSaturated
 from pathlib import Path
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # ----------------------------------
 # App initialization
 # ----------------------------------
 
-app = FastAPI(title="Regime-Aware Investor Guidance API")
+@asynccontextmanager
+async def lifespan(app):
+    # Single producer feeding every /stream/regime subscriber
+    producer = None
+    if broadcaster is not None:
+        producer = asyncio.create_task(broadcaster.run(bar_source))
+        producer.add_done_callback(log_producer_exit)
+    yield
+    if producer is not None:
+        producer.cancel()
+    cpu_executor.shutdown()
+
+def log_producer_exit(task):
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logger.error("Regime stream producer died; clients will only get heartbeats",
+                     exc_info=task.exception())
+    else:
+        logger.warning("Regime stream producer finished; no further bars will be sent")
+
+app = FastAPI(title="Regime-Aware Investor Guidance API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -56,25 +87,34 @@ if data_dir:
                 quotes_csv_path = data_dir / f
                 break
 
-if main_csv_path and main_csv_path.exists():
-    df = pd.read_csv(main_csv_path, index_col=0, parse_dates=True)
+def load_labelled_data(csv_path):
+    frame = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+
+    # One unparseable date would leave the whole index as strings
+    frame.index = pd.to_datetime(frame.index, errors="coerce")
+    frame = frame[frame.index.notna()]
     
-    if 'close' not in df.columns:
-        if 'cum_return' in df.columns:
-            df['close'] = df['cum_return'] * 8500
+    if 'close' not in frame.columns:
+        if 'cum_return' in frame.columns:
+            frame['close'] = frame['cum_return'] * 8500
         else:
-            df['close'] = 10000
+            frame['close'] = 10000
 
     label_map = {
         "Stable / Bull Market": "Stable",
         "Uncertain / Transition": "Uncertain",
         "Crisis / High Volatility": "Crisis"
     }
-    df['regime_label'] = df['regime_label'].replace(label_map)
-    df.sort_index(inplace=True)
-else:
+    frame['regime_label'] = frame['regime_label'].replace(label_map)
+    frame.sort_index(inplace=True)
+    return frame
+
+# Every reader goes through data_store.current(), which picks up rewrites of
+# the CSV, so REST endpoints and the stream always serve the same frame.
+data_store = LabelledDataStore(main_csv_path, load_labelled_data)
+
+if data_store.frame.empty:
     print("CRITICAL ERROR: Main Data CSV could not be loaded.")
-    df = pd.DataFrame()
 
 # Load Quotes
 quotes_data = []
@@ -98,15 +138,21 @@ if not quotes_data:
 # Helpers: Risk Logic
 # ----------------------------------
 
-def calculate_risk_metrics(row, lookback_window=5):
-    vol_20 = row.get('vol_20', 0.01)
-    vol_60 = row.get('vol_60', 0.01)
-    
+def early_warning_probability(vol_20, vol_60):
+    # Missing/NaN vols fall back to a neutral ratio instead of raising
+    vol_20 = 0.01 if vol_20 is None or np.isnan(vol_20) else vol_20
+    vol_60 = 0.01 if vol_60 is None or np.isnan(vol_60) else vol_60
+
     vol_ratio = vol_20 / vol_60 if vol_60 > 0 else 1.0
-    
+
     # Smoothed sensitivity
     prob_score = np.interp(vol_ratio, [1.1, 1.6, 2.5], [10, 50, 95])
-    early_warning_prob = int(np.clip(prob_score, 0, 99))
+    return int(np.clip(prob_score, 0, 99))
+
+def calculate_risk_metrics(df, row, lookback_window=5):
+    early_warning_prob = early_warning_probability(
+        row.get('vol_20', 0.01), row.get('vol_60', 0.01)
+    )
 
     current_date_idx = df.index.get_loc(row.name)
     start_idx = max(0, current_date_idx - lookback_window)
@@ -119,23 +165,104 @@ def calculate_risk_metrics(row, lookback_window=5):
     return early_warning_prob, has_recent_change
 
 
+def build_timeline_records(df, limit=300):
+    if df.empty: return []
+
+    timeline_df = df.reset_index()
+    if "Price" in timeline_df.columns: timeline_df = timeline_df.rename(columns={"Price": "date"})
+    elif "index" in timeline_df.columns: timeline_df = timeline_df.rename(columns={"index": "date"})
+    
+    if "date" not in timeline_df.columns or "close" not in timeline_df.columns:
+        return []
+
+    final_df = timeline_df[["date", "close", "regime_label"]].tail(limit)
+    final_df["date"] = final_df["date"].astype(str)
+    final_df["close"] = final_df["close"].astype(float)
+    return final_df.to_dict(orient="records")
+
+
+# ----------------------------------
+# Regime Stream
+# ----------------------------------
+# The producer follows data_store: when the pipeline rewrites the CSV, rows
+# newer than the last streamed date become deltas for every client; if
+# already-streamed history changed, everyone gets a fresh snapshot instead.
+# Until the CSV changes, subscribers only get the snapshot and heartbeats.
+
+STREAM_MAX_SUBSCRIBERS = int(os.getenv("STREAM_MAX_SUBSCRIBERS", "200"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "50"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "60"))
+
+bar_source = None
+broadcaster = None
+
+if not data_store.frame.empty:
+    latest = data_store.frame.iloc[-1]
+    broadcaster = RegimeBroadcaster(
+        timeline=build_timeline_records(data_store.frame),
+        early_warning_fn=early_warning_probability,
+        early_warning_prob=early_warning_probability(latest.get('vol_20'), latest.get('vol_60')),
+        max_subscribers=STREAM_MAX_SUBSCRIBERS,
+        max_queue=STREAM_QUEUE_SIZE,
+    )
+    bar_source = follow_csv(data_store, build_timeline_records, poll_seconds=STREAM_POLL_SECONDS)
+
+
+# ----------------------------------
+# Execution Model
+# ----------------------------------
+# Trivial endpoints are native async and never leave the event loop.
+# Pandas-heavy work runs on a dedicated bounded executor; when an endpoint
+# hits its concurrency limit we answer 429, when the shared queue is full 503.
+
+EXECUTOR_KIND = os.getenv("EXECUTOR_KIND", "thread")  # "thread" or "process"
+EXECUTOR_WORKERS = int(os.getenv("EXECUTOR_WORKERS", "4"))
+EXECUTOR_QUEUE_SIZE = int(os.getenv("EXECUTOR_QUEUE_SIZE", "32"))
+
+ENDPOINT_LIMITS = {
+    "investor-guidance": int(os.getenv("LIMIT_INVESTOR_GUIDANCE", "16")),
+    "regime-timeline": int(os.getenv("LIMIT_REGIME_TIMELINE", "8")),
+}
+
+cpu_executor = BoundedExecutor(
+    kind=EXECUTOR_KIND,
+    workers=EXECUTOR_WORKERS,
+    max_queue=EXECUTOR_QUEUE_SIZE,
+    endpoint_limits=ENDPOINT_LIMITS,
+)
+
+@app.exception_handler(EndpointBusy)
+async def endpoint_busy_handler(request: Request, exc: EndpointBusy):
+    return JSONResponse(status_code=429, content={"error": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    return JSONResponse(status_code=503, content={"error": str(exc)}, headers={"Retry-After": "2"})
+
+
 # ----------------------------------
 # Endpoints
 # ----------------------------------
 
 @app.get("/")
-def home():
+async def home():
     return {"status": "Backend running successfully"}
 
 @app.get("/random-quote")
-def get_random_quote():
+async def get_random_quote():
     return random.choice(quotes_data)
 
-@app.get("/investor-guidance")
-def investor_guidance(
-    date: str,
-    persona: str = Query("Balanced", enum=["Conservative", "Balanced", "Aggressive"])
-):
+@app.get("/executor-stats")
+async def executor_stats():
+    return cpu_executor.stats()
+
+def current_timeline_records():
+    return build_timeline_records(data_store.current())
+
+def compute_investor_guidance(date, persona):
+    # Runs on cpu_executor, off the event loop
+    df = data_store.current()
     if df.empty: return {"error": "Data not loaded"}
 
     date_obj = pd.to_datetime(date)
@@ -184,7 +311,7 @@ def investor_guidance(
 
     # --------------------------------------------------
 
-    ew_prob, recent_change = calculate_risk_metrics(row)
+    ew_prob, recent_change = calculate_risk_metrics(df, row)
 
     historical_stats = {
         "avg_return": float(df["log_return"].mean()),
@@ -208,18 +335,48 @@ def investor_guidance(
     
     return response
 
+@app.get("/investor-guidance")
+async def investor_guidance(
+    date: str,
+    persona: str = Query("Balanced", enum=["Conservative", "Balanced", "Aggressive"])
+):
+    return await cpu_executor.run("investor-guidance", compute_investor_guidance, date, persona)
+
 @app.get("/regime-timeline")
-def regime_timeline():
-    if df.empty: return []
+async def regime_timeline():
+    return await cpu_executor.run("regime-timeline", current_timeline_records)
+
+@app.get("/stream/regime")
+async def stream_regime(request: Request):
+    """
+    Server-Sent Events: one "snapshot" event, then timeline_point /
+    regime_change / early_warning deltas as new bars arrive.
+    """
+    if broadcaster is None:
+        raise HTTPException(status_code=503, detail="Data not loaded")
 
-    timeline_df = df.reset_index()
-    if "Price" in timeline_df.columns: timeline_df = timeline_df.rename(columns={"Price": "date"})
-    elif "index" in timeline_df.columns: timeline_df = timeline_df.rename(columns={"index": "date"})
-    
-    if "date" not in timeline_df.columns or "close" not in timeline_df.columns:
-        return []
+    try:
+        subscription = broadcaster.subscribe()
+    except SubscriberLimitReached as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
 
-    final_df = timeline_df[["date", "close", "regime_label"]].tail(300)
-    final_df["date"] = final_df["date"].astype(str)
-    final_df["close"] = final_df["close"].astype(float)
-    return final_df.to_dict(orient="records")
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,60 @@
+import logging
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------
+# Labelled data store
+# ----------------------------------
+
+class LabelledDataStore:
+    """
+    Single holder of the labelled regime DataFrame.
+
+    REST endpoints and the stream producer both read `current()`, which
+    reloads the CSV when its mtime changes and swaps in the new frame, so
+    every path serves the same data. Works per process: process-pool
+    workers each hold their own store and pick up rewrites the same way.
+    """
+
+    def __init__(self, csv_path, load_fn):
+        self.csv_path = Path(csv_path) if csv_path else None
+        self.load_fn = load_fn
+        self.frame = pd.DataFrame()
+        self.mtime = None
+        self.version = 0
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Reload if the CSV changed on disk. True if a new frame was installed."""
+        if self.csv_path is None:
+            return False
+        try:
+            mtime = self.csv_path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        if mtime == self.mtime:
+            return False
+
+        with self._lock:
+            if mtime == self.mtime:
+                return False
+            # Remember the mtime even on failure so a broken file is not
+            # re-parsed on every request; the previous frame stays in place
+            self.mtime = mtime
+            try:
+                frame = self.load_fn(self.csv_path)
+            except Exception:
+                logger.exception("Could not load %s; keeping previous data", self.csv_path)
+                return False
+            self.frame = frame
+            self.version += 1
+            return True
+
+    def current(self) -> pd.DataFrame:
+        self.refresh()
+        return self.frame
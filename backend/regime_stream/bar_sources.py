@@ -0,0 +1,123 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------
+# Bar sources
+# ----------------------------------
+# A bar is a plain dict with the same fields the timeline serves:
+#   {"date": "2024-11-21", "close": 23349.9, "regime_label": "Stable",
+#    "vol_20": 0.0081, "vol_60": 0.0094}
+# Any async iterable of bars can drive the broadcaster. A source may also
+# yield {"snapshot": [timeline points], "vol_20": .., "vol_60": ..} to
+# replace the whole timeline (e.g. history was relabelled).
+
+
+class QueueBarSource:
+    """
+    In-process bar source. Producers call push(), the broadcaster iterates.
+    """
+
+    _CLOSED = object()
+
+    def __init__(self):
+        self._queue = asyncio.Queue()
+
+    def push(self, bar: dict):
+        self._queue.put_nowait(bar)
+
+    def close(self):
+        self._queue.put_nowait(self._CLOSED)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        bar = await self._queue.get()
+        if bar is self._CLOSED:
+            raise StopAsyncIteration
+        return bar
+
+
+async def replay_bars(bars, interval_seconds: float = 0.0):
+    """
+    Fake bar source: yields a fixed list of bars, optionally paced.
+    """
+    for bar in bars:
+        if interval_seconds > 0:
+            await asyncio.sleep(interval_seconds)
+        yield bar
+
+
+def _bar_from_row(date, row):
+    return {
+        "date": date.strftime("%Y-%m-%d"),
+        "close": row["close"],
+        "regime_label": row["regime_label"],
+        "vol_20": row.get("vol_20"),
+        "vol_60": row.get("vol_60"),
+    }
+
+
+def _snapshot_item(frame, timeline_fn):
+    latest = frame.iloc[-1] if len(frame) else {}
+    return {
+        "snapshot": timeline_fn(frame),
+        "vol_20": latest.get("vol_20"),
+        "vol_60": latest.get("vol_60"),
+    }
+
+
+def _diff_frames(old, new, timeline_fn):
+    """
+    Items to stream after `old` was replaced by `new`: bars for the rows
+    appended after old's last date, or a single snapshot item if any row
+    already streamed was changed, removed or relabelled.
+    """
+    if old.empty or new.empty:
+        return [_snapshot_item(new, timeline_fn)]
+
+    newest = old.index[-1]
+    columns = ["close", "regime_label"]
+    history = new.loc[new.index <= newest, columns]
+    if not history.equals(old.loc[:, columns]):
+        return [_snapshot_item(new, timeline_fn)]
+
+    return [_bar_from_row(date, row) for date, row in new[new.index > newest].iterrows()]
+
+
+def follow_csv(store, timeline_fn, poll_seconds: float = 60.0):
+    """
+    Real bar source: follows a LabelledDataStore. Whenever its CSV is
+    rewritten, appended rows are yielded as bars; a rewrite that changes
+    history yields {"snapshot": timeline, "vol_20": .., "vol_60": ..} instead.
+    """
+    # Taken now, not on first iteration, so a rewrite between app import and
+    # producer start is not missed
+    initial_frame = store.frame
+    initial_version = store.version
+
+    async def items():
+        seen_frame = initial_frame
+        seen_version = initial_version
+
+        while True:
+            await asyncio.sleep(poll_seconds)
+            await asyncio.to_thread(store.refresh)
+            if store.version == seen_version:
+                continue
+            frame, seen_version = store.frame, store.version
+
+            try:
+                pending = _diff_frames(seen_frame, frame, timeline_fn)
+            except Exception:
+                # e.g. an unparseable date left the index as strings
+                logger.exception("Could not diff reloaded data; waiting for next rewrite")
+                continue
+            seen_frame = frame
+
+            for item in pending:
+                yield item
+
+    return items()
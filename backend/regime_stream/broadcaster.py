@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import math
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------
+# Event encoding
+# ----------------------------------
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# ----------------------------------
+# Subscribers
+# ----------------------------------
+
+class SubscriberLimitReached(Exception):
+    pass
+
+
+class Subscription:
+    """
+    One connected client. Holds a bounded queue of (event, data) tuples.
+    """
+
+    def __init__(self, max_queue: int):
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.resyncs = 0
+
+    def free_slots(self) -> int:
+        return self.queue.maxsize - self.queue.qsize()
+
+    def reset_to(self, event):
+        # Drop whatever the client has not consumed yet and start over
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+        self.resyncs += 1
+
+
+# ----------------------------------
+# Broadcaster (single producer -> many subscribers)
+# ----------------------------------
+
+class RegimeBroadcaster:
+    """
+    Keeps the latest regime state and fans out snapshot + deltas.
+
+    Each subscriber first receives a "snapshot" event, then only deltas:
+      - "timeline_point"   : a new bar appended to the timeline
+      - "regime_change"    : the regime label differs from the previous bar
+      - "early_warning"    : the early-warning probability changed
+
+    A source item with a "snapshot" key replaces the timeline and sends
+    every subscriber a fresh snapshot instead of deltas.
+
+    Backpressure: a subscriber whose queue cannot take a whole batch of
+    deltas is reset to a fresh snapshot instead of blocking the producer.
+    """
+
+    def __init__(
+        self,
+        timeline,
+        early_warning_fn,
+        early_warning_prob: int = 0,
+        max_subscribers: int = 100,
+        max_queue: int = 50,
+        timeline_length: int = 300,
+    ):
+        self.timeline = deque(timeline, maxlen=timeline_length)
+        self.regime = self.timeline[-1]["regime_label"] if self.timeline else None
+        self.early_warning_prob = early_warning_prob
+        self.early_warning_fn = early_warning_fn
+        self.max_subscribers = max_subscribers
+        self.max_queue = max(max_queue, 3)
+        self._subscribers = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def snapshot(self) -> dict:
+        return {
+            "timeline": list(self.timeline),
+            "regime": self.regime,
+            "early_warning_prob": self.early_warning_prob,
+        }
+
+    def subscribe(self) -> Subscription:
+        if len(self._subscribers) >= self.max_subscribers:
+            raise SubscriberLimitReached(
+                f"Maximum of {self.max_subscribers} stream subscribers reached"
+            )
+        subscription = Subscription(self.max_queue)
+        subscription.queue.put_nowait(("snapshot", self.snapshot()))
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def publish_bar(self, bar: dict):
+        # Everything is validated/computed before state changes, so a bad
+        # bar raises without leaving the broadcaster half-updated
+        point = {
+            "date": str(bar["date"]),
+            "close": float(bar["close"]),
+            "regime_label": bar["regime_label"],
+        }
+        if not math.isfinite(point["close"]):
+            raise ValueError(f"Non-finite close in bar for {point['date']}")
+        events = [("timeline_point", point)]
+
+        previous_regime = self.regime
+        if previous_regime is not None and point["regime_label"] != previous_regime:
+            events.append(("regime_change", {
+                "date": point["date"],
+                "from": previous_regime,
+                "to": point["regime_label"],
+            }))
+
+        ew_prob = self.early_warning_fn(bar.get("vol_20"), bar.get("vol_60"))
+        if ew_prob != self.early_warning_prob:
+            events.append(("early_warning", {
+                "date": point["date"],
+                "early_warning_prob": ew_prob,
+            }))
+
+        self.timeline.append(point)
+        self.regime = point["regime_label"]
+        self.early_warning_prob = ew_prob
+
+        self._fan_out(events)
+
+    def _fan_out(self, events):
+        snapshot_event = None
+        for subscription in self._subscribers:
+            if subscription.free_slots() >= len(events):
+                for event in events:
+                    subscription.queue.put_nowait(event)
+                continue
+
+            # Slow client: a snapshot already contains this batch
+            if snapshot_event is None:
+                snapshot_event = ("snapshot", self.snapshot())
+            subscription.reset_to(snapshot_event)
+
+    def reset(self, timeline, vol_20=None, vol_60=None):
+        ew_prob = self.early_warning_fn(vol_20, vol_60)
+        self.timeline = deque(timeline, maxlen=self.timeline.maxlen)
+        self.regime = self.timeline[-1]["regime_label"] if self.timeline else None
+        self.early_warning_prob = ew_prob
+
+        # Queued deltas refer to the old history; the snapshot supersedes them
+        snapshot_event = ("snapshot", self.snapshot())
+        for subscription in self._subscribers:
+            subscription.reset_to(snapshot_event)
+
+    async def run(self, bar_source):
+        async for bar in bar_source:
+            try:
+                if "snapshot" in bar:
+                    self.reset(bar["snapshot"], bar.get("vol_20"), bar.get("vol_60"))
+                else:
+                    self.publish_bar(bar)
+            except Exception:
+                # One malformed bar must not kill the only producer
+                logger.exception("Skipping malformed bar: %r", bar)
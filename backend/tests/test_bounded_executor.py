@@ -0,0 +1,197 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from execution.bounded_executor import BoundedExecutor, EndpointBusy, ExecutorSaturated
+
+
+def wait_for(gate):
+    gate.wait(timeout=5)
+    return "done"
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def square(x):
+    return x * x
+
+
+def crash():
+    # Simulates a worker killed by the OOM killer / a segfault
+    os._exit(1)
+
+
+async def settle(executor, in_flight, timeout=2.0):
+    # Done-callbacks hop back to the loop; give them a chance to run
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while executor.stats()["in_flight"] != in_flight:
+        assert loop.time() < deadline, executor.stats()
+        await asyncio.sleep(0.01)
+
+
+def test_endpoint_limit_gives_busy_and_full_queue_gives_saturated():
+    async def scenario():
+        executor = BoundedExecutor(workers=1, max_queue=1, endpoint_limits={"heavy": 1})
+        gate = threading.Event()
+        try:
+            running = asyncio.create_task(executor.run("heavy", wait_for, gate))
+            await asyncio.sleep(0)
+
+            with pytest.raises(EndpointBusy):
+                await executor.run("heavy", wait_for, gate)
+
+            queued = asyncio.create_task(executor.run("light", wait_for, gate))
+            await asyncio.sleep(0)
+            assert executor.stats()["queue_depth"] == 1
+
+            with pytest.raises(ExecutorSaturated):
+                await executor.run("other", wait_for, gate)
+
+            gate.set()
+            assert await running == "done"
+            assert await queued == "done"
+            await settle(executor, 0)
+            return executor.stats()
+        finally:
+            gate.set()
+            executor.shutdown()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["endpoints"]["heavy"] == {
+        "active": 0, "limit": 1, "completed": 1, "failed": 0, "cancelled": 0, "shed": 1,
+    }
+    assert stats["endpoints"]["other"]["shed"] == 1
+    assert stats["endpoints"]["light"]["completed"] == 1
+    assert stats["wait_ms"]["samples"] == 2
+    assert stats["wait_ms"]["max"] > 0
+
+
+def test_cancelled_request_keeps_slot_until_work_finishes():
+    async def scenario():
+        executor = BoundedExecutor(workers=1, max_queue=1, endpoint_limits={"heavy": 2})
+        gate = threading.Event()
+        try:
+            running = asyncio.create_task(executor.run("heavy", wait_for, gate))
+            await asyncio.sleep(0.05)
+            queued = asyncio.create_task(executor.run("heavy", wait_for, gate))
+            await asyncio.sleep(0)
+
+            # Clients disconnect: both awaiting requests are cancelled
+            running.cancel()
+            queued.cancel()
+            await asyncio.gather(running, queued, return_exceptions=True)
+            await asyncio.sleep(0.05)
+
+            # The queued call never started and is released; the running one
+            # still occupies its worker and its endpoint slot
+            stats = executor.stats()
+            assert stats["in_flight"] == 1
+            assert stats["endpoints"]["heavy"]["active"] == 1
+            assert stats["endpoints"]["heavy"]["cancelled"] == 1
+
+            # Worker busy + one queued again -> the next call is shed
+            refill = asyncio.create_task(executor.run("heavy", wait_for, gate))
+            await asyncio.sleep(0)
+            with pytest.raises(ExecutorSaturated):
+                await executor.run("other", wait_for, gate)
+
+            gate.set()
+            assert await refill == "done"
+            await settle(executor, 0)
+            return executor.stats()
+        finally:
+            gate.set()
+            executor.shutdown()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["endpoints"]["heavy"]["active"] == 0
+    assert stats["endpoints"]["heavy"]["completed"] == 2
+
+
+def test_failed_call_raises_and_still_reports_wait():
+    async def scenario():
+        executor = BoundedExecutor(workers=1, max_queue=1)
+        try:
+            with pytest.raises(ValueError, match="bad date"):
+                await executor.run("guidance", fail, "bad date")
+            await settle(executor, 0)
+            return executor.stats()
+        finally:
+            executor.shutdown()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["endpoints"]["guidance"]["failed"] == 1
+    assert stats["wait_ms"]["samples"] == 1
+
+
+def test_process_pool_round_trips_results_and_errors():
+    async def scenario():
+        executor = BoundedExecutor(kind="process", workers=1, max_queue=1)
+        try:
+            assert await executor.run("calc", square, 7) == 49
+            with pytest.raises(ValueError, match="bad date"):
+                await executor.run("calc", fail, "bad date")
+            await settle(executor, 0)
+            return executor.stats()
+        finally:
+            executor.shutdown()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["kind"] == "process"
+    assert stats["endpoints"]["calc"]["completed"] == 1
+    assert stats["endpoints"]["calc"]["failed"] == 1
+
+
+def test_process_pool_recovers_after_worker_dies():
+    async def scenario():
+        executor = BoundedExecutor(kind="process", workers=1, max_queue=1)
+        try:
+            with pytest.raises(ExecutorSaturated, match="restarting"):
+                await executor.run("calc", crash)
+            await settle(executor, 0)
+
+            # Fresh pool serves the next request instead of failing forever
+            assert await executor.run("calc", square, 3) == 9
+            await settle(executor, 0)
+            return executor.stats()
+        finally:
+            executor.shutdown()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["pool_restarts"] == 1
+    assert stats["endpoints"]["calc"]["failed"] == 1
+    assert stats["endpoints"]["calc"]["completed"] == 1
+
+
+def test_submit_to_broken_pool_is_shed_and_pool_replaced():
+    async def scenario():
+        executor = BoundedExecutor(kind="process", workers=1, max_queue=1)
+        try:
+            # Break the pool behind the executor's back, as a crash between
+            # requests would
+            with pytest.raises(Exception):
+                await asyncio.wrap_future(executor._pool.submit(crash))
+
+            with pytest.raises(ExecutorSaturated, match="restarting"):
+                await executor.run("calc", square, 2)
+            assert await executor.run("calc", square, 4) == 16
+            await settle(executor, 0)
+            return executor.stats()
+        finally:
+            executor.shutdown()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["pool_restarts"] == 1
+    assert stats["endpoints"]["calc"]["shed"] == 1
+    assert stats["endpoints"]["calc"]["completed"] == 1
@@ -0,0 +1,234 @@
+import asyncio
+import os
+
+import pandas as pd
+import pytest
+
+from market_data.store import LabelledDataStore
+from regime_stream.bar_sources import QueueBarSource, follow_csv, replay_bars
+from regime_stream.broadcaster import RegimeBroadcaster, SubscriberLimitReached
+
+
+def ew_from_vol(vol_20, vol_60):
+    return int((vol_20 or 0) * 1000)
+
+
+def make_bar(date, regime="Stable", close=100.0, vol_20=0.0):
+    return {"date": date, "close": close, "regime_label": regime, "vol_20": vol_20, "vol_60": 0.01}
+
+
+def make_broadcaster(**kwargs):
+    timeline = [{"date": "2024-01-01", "close": 100.0, "regime_label": "Stable"}]
+    return RegimeBroadcaster(timeline, ew_from_vol, **kwargs)
+
+
+def drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def test_snapshot_then_deltas():
+    async def scenario():
+        broadcaster = make_broadcaster()
+        subscription = broadcaster.subscribe()
+        await broadcaster.run(replay_bars([
+            make_bar("2024-01-02"),
+            make_bar("2024-01-03", regime="Crisis", vol_20=0.02),
+        ]))
+        return drain(subscription)
+
+    events = asyncio.run(scenario())
+
+    assert [name for name, _ in events] == [
+        "snapshot",
+        "timeline_point",
+        "timeline_point", "regime_change", "early_warning",
+    ]
+    assert events[0][1]["timeline"][-1]["date"] == "2024-01-01"
+    assert events[3][1] == {"date": "2024-01-03", "from": "Stable", "to": "Crisis"}
+    assert events[4][1]["early_warning_prob"] == 20
+
+
+def test_slow_subscriber_is_reset_to_snapshot():
+    async def scenario():
+        broadcaster = make_broadcaster(max_queue=3)
+        slow = broadcaster.subscribe()
+        await broadcaster.run(replay_bars([make_bar(f"2024-01-0{i}") for i in range(2, 7)]))
+        return slow
+
+    slow = asyncio.run(scenario())
+    events = drain(slow)
+
+    # Queue fills on 2024-01-03; the 01-04 bar resets it to a snapshot that
+    # already contains it, then deltas resume
+    assert slow.resyncs == 1
+    assert [name for name, _ in events] == ["snapshot", "timeline_point", "timeline_point"]
+    assert events[0][1]["timeline"][-1]["date"] == "2024-01-04"
+    assert [data["date"] for _, data in events[1:]] == ["2024-01-05", "2024-01-06"]
+
+
+def test_subscriber_limit():
+    broadcaster = make_broadcaster(max_subscribers=2)
+    first = broadcaster.subscribe()
+    broadcaster.subscribe()
+
+    with pytest.raises(SubscriberLimitReached):
+        broadcaster.subscribe()
+
+    broadcaster.unsubscribe(first)
+    broadcaster.subscribe()
+    assert broadcaster.subscriber_count == 2
+
+
+def test_bad_bar_is_skipped_and_producer_keeps_running():
+    async def scenario():
+        broadcaster = make_broadcaster()
+        subscription = broadcaster.subscribe()
+        source = QueueBarSource()
+        producer = asyncio.create_task(broadcaster.run(source))
+
+        source.push(make_bar("2024-01-02", close=None))
+        source.push({"date": "2024-01-03"})
+        source.push(make_bar("2024-01-04", close=float("nan")))
+        source.push(make_bar("2024-01-05"))
+        source.close()
+        await asyncio.wait_for(producer, timeout=1)
+        return drain(subscription)
+
+    events = asyncio.run(scenario())
+
+    assert [name for name, _ in events] == ["snapshot", "timeline_point"]
+    assert events[1][1]["date"] == "2024-01-05"
+
+
+HEADER = "Price,close,regime_label,vol_20,vol_60\n"
+
+
+def write_csv(path, rows):
+    # Bump mtime explicitly: rewrites within one test can share a timestamp
+    previous = path.stat().st_mtime if path.exists() else 0
+    path.write_text(HEADER + "".join(row + "\n" for row in rows))
+    os.utime(path, (previous + 10, previous + 10))
+
+
+def load(path):
+    return pd.read_csv(path, index_col=0, parse_dates=True)
+
+
+def timeline(frame):
+    return [
+        {"date": str(date)[:10], "close": float(row["close"]), "regime_label": row["regime_label"]}
+        for date, row in frame.iterrows()
+    ]
+
+
+async def next_item(source):
+    return await asyncio.wait_for(source.__anext__(), timeout=2)
+
+
+def test_store_swaps_frame_when_csv_is_rewritten(tmp_path):
+    csv_path = tmp_path / "labels.csv"
+    write_csv(csv_path, ["2024-01-01,100.0,Stable,0.01,0.01"])
+    store = LabelledDataStore(csv_path, load)
+    assert len(store.current()) == 1
+
+    write_csv(csv_path, ["2024-01-01,100.0,Stable,0.01,0.01", "2024-01-02,99.0,Crisis,0.03,0.01"])
+
+    assert len(store.current()) == 2
+    assert store.version == 2
+
+
+def test_store_keeps_previous_frame_when_reload_fails(tmp_path):
+    csv_path = tmp_path / "labels.csv"
+    write_csv(csv_path, ["2024-01-01,100.0,Stable,0.01,0.01"])
+    calls = []
+
+    def flaky_load(path):
+        calls.append(path)
+        if len(calls) > 1:
+            raise ValueError("half-written file")
+        return load(path)
+
+    store = LabelledDataStore(csv_path, flaky_load)
+    write_csv(csv_path, ["garbage"])
+
+    assert len(store.current()) == 1
+    assert len(store.current()) == 1
+    assert len(calls) == 2  # not re-parsed on every read
+
+
+def test_follow_csv_yields_rows_added_after_rewrite(tmp_path):
+    csv_path = tmp_path / "labels.csv"
+    write_csv(csv_path, ["2024-01-01,100.0,Stable,0.01,0.01"])
+    store = LabelledDataStore(csv_path, load)
+
+    async def scenario():
+        source = follow_csv(store, timeline, poll_seconds=0)
+        write_csv(csv_path, ["2024-01-01,100.0,Stable,0.01,0.01", "2024-01-02,99.0,Crisis,0.03,0.01"])
+        bar = await next_item(source)
+        await source.aclose()
+        return bar
+
+    bar = asyncio.run(scenario())
+
+    assert bar["date"] == "2024-01-02"
+    assert bar["regime_label"] == "Crisis"
+    assert bar["close"] == 99.0
+
+
+def test_follow_csv_resnapshots_when_history_is_relabelled(tmp_path):
+    csv_path = tmp_path / "labels.csv"
+    write_csv(csv_path, ["2024-01-01,100.0,Stable,0.01,0.01", "2024-01-02,99.0,Stable,0.01,0.01"])
+    store = LabelledDataStore(csv_path, load)
+    broadcaster = RegimeBroadcaster(timeline(store.frame), ew_from_vol)
+
+    async def scenario():
+        subscription = broadcaster.subscribe()
+        drain(subscription)
+        source = follow_csv(store, timeline, poll_seconds=0)
+        producer = asyncio.create_task(broadcaster.run(source))
+
+        # Re-clustering relabels an already-streamed day and appends one
+        write_csv(csv_path, [
+            "2024-01-01,100.0,Stable,0.01,0.01",
+            "2024-01-02,99.0,Crisis,0.01,0.01",
+            "2024-01-03,98.0,Crisis,0.02,0.01",
+        ])
+        event = await asyncio.wait_for(subscription.queue.get(), timeout=2)
+        producer.cancel()
+        return event
+
+    name, data = asyncio.run(scenario())
+
+    assert name == "snapshot"
+    assert [p["regime_label"] for p in data["timeline"]] == ["Stable", "Crisis", "Crisis"]
+    assert data["regime"] == "Crisis"
+    assert data["early_warning_prob"] == 20
+    assert [p["regime_label"] for p in broadcaster.snapshot()["timeline"]] == ["Stable", "Crisis", "Crisis"]
+
+
+def test_follow_csv_survives_unparseable_date(tmp_path):
+    csv_path = tmp_path / "labels.csv"
+    write_csv(csv_path, ["2024-01-01,100.0,Stable,0.01,0.01"])
+    store = LabelledDataStore(csv_path, load)
+
+    async def scenario():
+        source = follow_csv(store, timeline, poll_seconds=0)
+
+        # Without coercion the index stays strings and comparing it to the
+        # last Timestamp raises; the source must log and keep going
+        write_csv(csv_path, ["2024-01-01,100.0,Stable,0.01,0.01", "not-a-date,99.0,Crisis,0.03,0.01"])
+        pending = asyncio.ensure_future(next_item(source))
+        await asyncio.sleep(0.1)
+        assert not pending.done()
+
+        write_csv(csv_path, ["2024-01-01,100.0,Stable,0.01,0.01", "2024-01-02,99.0,Crisis,0.03,0.01"])
+        bar = await pending
+        await source.aclose()
+        return bar
+
+    bar = asyncio.run(scenario())
+
+    assert bar["date"] == "2024-01-02"
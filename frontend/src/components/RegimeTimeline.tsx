@@ -22,17 +22,42 @@ export default function RegimeTimeline({ selectedDate }: { selectedDate?: string
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    fetch(`${API_BASE}/regime-timeline`)
-      .then((res) => res.json())
-      .then((rawData) => {
-        const formattedData = rawData.map((d: any) => ({
-          ...d,
-          close: parseFloat(d.close),
-        }));
-        setData(formattedData);
-      })
-      .catch(err => console.error(err))
-      .finally(() => setLoading(false));
+    // Snapshot first, then one small "timeline_point" event per new bar
+    const source = new EventSource(`${API_BASE}/stream/regime`);
+    let hasSnapshot = false;
+
+    source.addEventListener("snapshot", (e) => {
+      hasSnapshot = true;
+      const snapshot = JSON.parse((e as MessageEvent).data);
+      setData(snapshot.timeline.map((d: any) => ({ ...d, close: parseFloat(d.close) })));
+      setLoading(false);
+    });
+
+    source.addEventListener("timeline_point", (e) => {
+      const point = JSON.parse((e as MessageEvent).data);
+      setData(prev => [...prev, { ...point, close: parseFloat(point.close) }].slice(-300));
+    });
+
+    source.onerror = () => {
+      // After a snapshot, let EventSource reconnect on its own (the server
+      // resends a snapshot). Before one, the stream is refused or the backend
+      // is unreachable: stop retrying and fall back to a one-off fetch.
+      if (hasSnapshot) return;
+      source.close();
+      fetch(`${API_BASE}/regime-timeline`)
+        .then((res) => res.json())
+        .then((rawData) => {
+          const formattedData = rawData.map((d: any) => ({
+            ...d,
+            close: parseFloat(d.close),
+          }));
+          setData(formattedData);
+        })
+        .catch(err => console.error(err))
+        .finally(() => setLoading(false));
+    };
+
+    return () => source.close();
   }, []);
 
   // ---------------------------------------------------------
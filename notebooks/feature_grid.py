@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+# ================================
+# Multi-Window Feature Grid
+# ================================
+# Computes the rolling features of 02_feature_engineering.py
+# (volatility, mean return, moving average) for many window lengths at once.
+#
+# Instead of one pandas `rolling` call per window per feature, each input
+# series is prefix-summed ONCE (sum and sum of squares); every window is then
+# a vectorised difference of two prefix sums, so adding windows is cheap.
+
+DEFAULT_WINDOWS = list(range(5, 251, 5))
+
+
+def _prefix_sums(values):
+    """
+    Shifted prefix sums of a series with NaN gaps.
+
+    Returns (count, sum, sum_sq, shift). Values are centred on `shift` before
+    summing so the sum of squares does not lose precision on large levels
+    (e.g. index closes ~ 20,000).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+
+    shift = values[valid].mean() if valid.any() else 0.0
+    centred = np.where(valid, values - shift, 0.0)
+
+    count = np.concatenate(([0], np.cumsum(valid)))
+    s1 = np.concatenate(([0.0], np.cumsum(centred)))
+    s2 = np.concatenate(([0.0], np.cumsum(centred * centred)))
+    return count, s1, s2, shift
+
+
+def _window_stats(prefix, window, with_std=True):
+    """
+    Rolling mean (and sample std, ddof=1) for one window from prefix sums.
+    Matches pandas `rolling(window)` with the default min_periods=window.
+    """
+    count, s1, s2, shift = prefix
+    n = len(count) - 1
+
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan) if with_std else None
+    if window > n:
+        return mean, std
+
+    w_count = count[window:] - count[:-window]
+    w_s1 = s1[window:] - s1[:-window]
+    full = w_count == window
+
+    centred_mean = w_s1 / window
+    mean[window - 1:] = np.where(full, centred_mean + shift, np.nan)
+
+    if with_std:
+        w_s2 = s2[window:] - s2[:-window]
+        # Sum of squared deviations = S2 - S1^2 / w; clipped at zero because
+        # round-off can push flat windows slightly negative
+        var = (w_s2 - w_s1 * centred_mean) / (window - 1)
+        var = np.maximum(var, 0.0)
+        std[window - 1:] = np.where(full, np.sqrt(var), np.nan)
+
+    return mean, std
+
+
+def compute_feature_grid(log_return, close, windows=None, ma_pairs=None):
+    """
+    Returns (matrix, columns): a float32 array of shape (n_rows, n_features)
+    and the matching column names.
+
+    Per window w: vol_w, mean_return_w, ma_w.
+    Optional ma_pairs [(fast, slow), ...] add ma_diff_fast_slow columns,
+    e.g. (20, 60) reproduces `ma_diff` from 02_feature_engineering.py.
+    """
+    windows = sorted(set(DEFAULT_WINDOWS if windows is None else windows))
+    if not windows:
+        raise ValueError("At least one window length is required")
+    if any(w < 2 for w in windows):
+        raise ValueError("Window lengths must be at least 2 (std needs ddof=1)")
+
+    pairs = []
+    for pair in ma_pairs or []:
+        try:
+            fast, slow = pair
+        except (TypeError, ValueError):
+            raise ValueError(f"ma_pairs entries must be (fast, slow) tuples, got {pair!r}")
+        if fast < 1 or slow < 1:
+            raise ValueError("ma_pairs window lengths must be at least 1")
+        pairs.append((fast, slow))
+
+    return_prefix = _prefix_sums(log_return)
+    close_prefix = _prefix_sums(close)
+
+    columns = []
+    blocks = []
+    ma_by_window = {}
+
+    for w in windows:
+        mean_return, vol = _window_stats(return_prefix, w)
+        ma, _ = _window_stats(close_prefix, w, with_std=False)
+        ma_by_window[w] = ma
+
+        columns += [f"vol_{w}", f"mean_return_{w}", f"ma_{w}"]
+        blocks += [vol, mean_return, ma]
+
+    for fast, slow in pairs:
+        for w in (fast, slow):
+            if w not in ma_by_window:
+                ma_by_window[w], _ = _window_stats(close_prefix, w, with_std=False)
+        columns.append(f"ma_diff_{fast}_{slow}")
+        blocks.append(ma_by_window[fast] - ma_by_window[slow])
+
+    matrix = np.empty((len(blocks[0]), len(blocks)), dtype=np.float32)
+    for j, block in enumerate(blocks):
+        matrix[:, j] = block
+
+    return matrix, columns
+
+
+def feature_grid_frame(df, windows=None, ma_pairs=None, dropna=True):
+    """
+    DataFrame wrapper: expects `log_return` and `Close` columns as produced in
+    02_feature_engineering.py. The result can be passed straight to the
+    StandardScaler / KMeans stage in 03_clustering.py.
+    """
+    matrix, columns = compute_feature_grid(
+        df["log_return"].to_numpy(),
+        df["Close"].to_numpy(),
+        windows=windows,
+        ma_pairs=ma_pairs,
+    )
+    grid = pd.DataFrame(matrix, index=df.index, columns=columns)
+    if dropna:
+        grid = grid.dropna()
+    return grid
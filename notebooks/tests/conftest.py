@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# feature_grid.py sits next to the numbered notebook scripts
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_grid import compute_feature_grid, feature_grid_frame
+
+
+def make_prices(n=400, level=20000.0, seed=7):
+    rng = np.random.default_rng(seed)
+    close = level * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    frame = pd.DataFrame({"Close": close}, index=pd.date_range("2020-01-01", periods=n, freq="B"))
+    frame["log_return"] = np.log(frame["Close"] / frame["Close"].shift(1))
+    return frame
+
+
+def pandas_baseline(frame, windows):
+    columns = {}
+    for w in windows:
+        columns[f"vol_{w}"] = frame["log_return"].rolling(window=w).std()
+        columns[f"mean_return_{w}"] = frame["log_return"].rolling(window=w).mean()
+        columns[f"ma_{w}"] = frame["Close"].rolling(window=w).mean()
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def assert_matches_pandas(grid, baseline):
+    baseline = baseline[grid.columns.intersection(baseline.columns)]
+    grid = grid[baseline.columns]
+    assert (grid.isna() == baseline.isna()).all().all()
+    scaled_error = (grid.astype("float64") - baseline).abs() / baseline.abs().max()
+    assert scaled_error.max().max() < 1e-5
+
+
+def test_matches_pandas_rolling_at_large_price_level():
+    frame = make_prices(level=50000.0)
+    windows = [2, 5, 20, 60, 250]
+
+    grid = feature_grid_frame(frame, windows, dropna=False)
+
+    assert (grid.dtypes == np.float32).all()
+    assert_matches_pandas(grid, pandas_baseline(frame, windows))
+
+
+def test_nan_gaps_give_same_missing_rows_as_pandas():
+    frame = make_prices()
+    frame.iloc[100:103, frame.columns.get_loc("log_return")] = np.nan
+    frame.iloc[250, frame.columns.get_loc("Close")] = np.nan
+    windows = [5, 20]
+
+    grid = feature_grid_frame(frame, windows, dropna=False)
+
+    assert_matches_pandas(grid, pandas_baseline(frame, windows))
+
+
+def test_window_longer_than_series_is_all_nan():
+    frame = make_prices(n=30)
+
+    grid = feature_grid_frame(frame, [5, 60], dropna=False)
+
+    assert grid[["vol_60", "mean_return_60", "ma_60"]].isna().all().all()
+    assert grid["ma_5"].notna().sum() == 26
+
+
+def test_ma_pairs_reproduce_ma_diff():
+    frame = make_prices()
+    ma_diff = frame["Close"].rolling(window=20).mean() - frame["Close"].rolling(window=60).mean()
+
+    grid = feature_grid_frame(frame, [5], ma_pairs=[(20, 60)], dropna=False)
+
+    np.testing.assert_allclose(grid["ma_diff_20_60"], ma_diff, rtol=0, atol=0.05)
+    assert grid["ma_diff_20_60"].isna().sum() == 59
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"windows": []},
+    {"windows": [1, 5]},
+    {"windows": [5], "ma_pairs": [(0, 5)]},
+    {"windows": [5], "ma_pairs": [(5,)]},
+    {"windows": [5], "ma_pairs": [5]},
+])
+def test_invalid_arguments_raise_value_error(kwargs):
+    frame = make_prices(n=50)
+
+    with pytest.raises(ValueError):
+        compute_feature_grid(frame["log_return"], frame["Close"], **kwargs)